@@ -0,0 +1,301 @@
+# file: log_config.py
+import os
+import sys
+import json
+import time
+import queue
+import random
+import atexit
+import logging
+import logging.handlers
+import contextvars
+import subprocess
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+# --- 1. Settings (sab .env se override ho sakte hain) ---
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# DEBUG payload logs (poora answer, sheet rows) ka kitna hissa likhna hai: 0.0 - 1.0
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+# Lambe strings ko itne characters ke baad kaat do
+LOG_MAX_FIELD_LENGTH = int(os.getenv("LOG_MAX_FIELD_LENGTH", "300"))
+# Redaction default ON hai; sirf local debugging ke liye "false" karein
+LOG_REDACT = os.getenv("LOG_REDACT", "true").lower() not in ("0", "false", "no")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+SENSITIVE_KEYS = {
+    "password",
+    "password_hash",
+    "token",
+    "access_token",
+    "authorization",
+    "jwt",
+    "secret",
+    "api_key",
+    "screenshot",
+}
+REDACTED = "[REDACTED]"
+
+# Har request ka apna ID; middleware isse set karta hai
+request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+
+# Standard LogRecord attributes - inke alawa jo bhi `extra=` mein aaye woh JSON field banega
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+# --- 2. Field Helpers ---
+def truncate(value: Any, limit: int = LOG_MAX_FIELD_LENGTH) -> Any:
+    """Cut long strings so one big payload cannot flood the log."""
+    if isinstance(value, str) and len(value) > limit:
+        return f"{value[:limit]}...[+{len(value) - limit} chars]"
+    return value
+
+
+def scrub(value: Any, redact: bool = LOG_REDACT, limit: int = LOG_MAX_FIELD_LENGTH) -> Any:
+    """Recursively redact sensitive keys and truncate large fields."""
+    if isinstance(value, dict):
+        return {
+            k: (REDACTED if redact and str(k).lower() in SENSITIVE_KEYS else scrub(v, redact, limit))
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [scrub(v, redact, limit) for v in value]
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    return truncate(str(value), limit)
+
+
+# --- 3. Filters & Formatter ---
+class RequestIdFilter(logging.Filter):
+    """Attach the current request ID before the record leaves the request's context."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep every INFO+ record but only a fraction of DEBUG payload records."""
+
+    def __init__(self, rate: float = LOG_SAMPLE_RATE):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Render a record as one JSON line with redacted, truncated extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": truncate(getattr(record, "request_id", "-"), 64),
+            "msg": truncate(record.getMessage()),
+        }
+        # `extra=` fields core fields (ts, level, msg, ...) ko overwrite nahi kar sakte
+        extra = {k: v for k, v in vars(record).items() if k not in _RESERVED_ATTRS and k not in entry}
+        for key, value in scrub(extra).items():
+            entry.setdefault(key, value)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+# --- 4. Queue-backed Setup ---
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Like QueueHandler, but keeps the traceback out of the (truncated) message.
+    When the queue is full, DEBUG/INFO records are dropped (and counted);
+    WARNING and above go straight to stderr. It never waits for space, since
+    the caller is usually the event loop.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Root par sirf yahi handler hai, isliye record copy karne ki zaroorat nahi
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = _EXC_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        # Handler.handle() self.lock ke andar call karta hai, isliye `dropped` thread-safe hai
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno < logging.WARNING:
+                self.dropped += 1
+                return
+            # WARNING+ kabhi drop nahi hota - seedha stderr, saath mein ab tak ka dropped count bhi
+            if self.dropped:
+                sys.stderr.write(_JSON_FORMATTER.format(self.dropped_record()) + "\n")
+                self.dropped = 0
+            sys.stderr.write(_JSON_FORMATTER.format(record) + "\n")
+            return
+
+        # Jagah wapas mil gayi - ab tak kitne records gaye woh ek WARNING mein batao
+        if self.dropped:
+            try:
+                self.queue.put_nowait(self.dropped_record())
+                self.dropped = 0
+            except queue.Full:
+                pass
+
+    def dropped_record(self) -> logging.LogRecord:
+        record = logging.makeLogRecord({
+            "name": __name__,
+            "levelno": logging.WARNING,
+            "levelname": "WARNING",
+            "msg": "Log queue was full, records dropped",
+            "dropped": self.dropped,
+        })
+        record.request_id = request_id_var.get()
+        return record
+
+
+_EXC_FORMATTER = logging.Formatter()
+_JSON_FORMATTER = JsonFormatter()
+
+# Request path sirf queue mein record daalta hai; stdout par likhna background thread karta hai
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[_QueueHandler] = None
+
+
+def setup_logging(stream=None, queue_size: int = LOG_QUEUE_SIZE) -> logging.handlers.QueueListener:
+    """
+    Install the async JSON handler on the root logger (safe to call more than once).
+    Note: this also turns off logging.logThreads/logProcesses/logMultiprocessing,
+    which are process-wide flags - every library's records lose those fields.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return _listener
+
+    log_queue: queue.Queue = queue.Queue(queue_size)
+
+    stream_handler = logging.StreamHandler(stream or sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    queue_handler.addFilter(SamplingFilter())
+
+    # JSON mein process/thread fields nahi jaate - unhe har record par collect mat karo.
+    # Yeh flags poore process ke liye hain (sab libraries ke records par lagte hain)
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+
+    _queue_handler = queue_handler
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """Flush whatever is still in the queue and stop the listener thread."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        # Band hone se pehle bache hue dropped count ko bhi report karo
+        if _queue_handler.dropped:
+            _queue_handler.queue.put(_queue_handler.dropped_record())
+            _queue_handler.dropped = 0
+        _listener.stop()
+        _listener = None
+        _queue_handler = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    setup_logging()
+    return logging.getLogger(name)
+
+
+# --- 5. Benchmark (python log_config.py) ---
+# Har "request" jitna log karta hai (1 INFO + 1 DEBUG payload) uska per-request overhead naapta hai.
+# Sink ek pipe hai jise doosra process padhta hai (jaise uvicorn ka stdout kisi log collector mein).
+if __name__ == "__main__":
+    iterations = int(os.getenv("LOG_BENCH_ITERATIONS", "20000"))
+    payload = {"Name": "Bench User", "Email": "bench@example.com", "Password_Hash": "x" * 60}
+    answer = "lorem ipsum " * 400
+
+    def report(label: str, elapsed: float):
+        sys.stderr.write(f"{label:<36} {elapsed / iterations * 1e6:8.2f} us/request\n")
+
+    def run(label: str, fn) -> float:
+        start = time.perf_counter()
+        for i in range(iterations):
+            fn(i)
+        elapsed = time.perf_counter() - start
+        report(label, elapsed)
+        return start
+
+    def open_sink():
+        reader = subprocess.Popen(
+            [sys.executable, "-c", "import sys, shutil, os; shutil.copyfileobj(sys.stdin.buffer, open(os.devnull, 'wb'))"],
+            stdin=subprocess.PIPE,
+        )
+        return reader, open(reader.stdin.fileno(), "w", encoding="utf-8", closefd=False)
+
+    def close_sink(reader, sink):
+        sink.close()
+        reader.stdin.close()
+        reader.wait()
+
+    def log_request(log: logging.Logger, i: int):
+        token = request_id_var.set(f"bench-{i}")
+        log.info("chat answered", extra={"user": payload["Email"], "answer_chars": len(answer)})
+        log.debug("chat answer", extra={"answer": answer, "row": payload})
+        request_id_var.reset(token)
+
+    sys.stderr.write(f"LOG_LEVEL={LOG_LEVEL} LOG_SAMPLE_RATE={LOG_SAMPLE_RATE} iterations={iterations}\n")
+
+    # setup_logging() yeh flags band karta hai - har scenario same conditions mein chale isliye pehle hi band karo
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    # 1. Purana tareeka: poora payload print, har line flush (tty / python -u jaisa)
+    reader, sink = open_sink()
+    run("print to pipe (old)", lambda i: print(f"📦 Data: {payload}\n<-- Sending answer: {answer}", file=sink, flush=True))
+    close_sink(reader, sink)
+
+    # 2. Same JSON records, lekin request thread khud pipe par likhta hai
+    reader, sink = open_sink()
+    sync_handler = logging.StreamHandler(sink)
+    sync_handler.setFormatter(JsonFormatter())
+    sync_handler.addFilter(RequestIdFilter())
+    sync_handler.addFilter(SamplingFilter())
+    sync_log = logging.getLogger("bench.sync")
+    sync_log.handlers = [sync_handler]
+    sync_log.propagate = False
+    sync_log.setLevel(LOG_LEVEL)
+    run("sync json handler to pipe", lambda i: log_request(sync_log, i))
+    close_sink(reader, sink)
+
+    # 3. Queue-backed: queue itna bada ki koi record drop na ho
+    reader, sink = open_sink()
+    setup_logging(stream=sink, queue_size=2 * iterations + 1)
+    queued_log = logging.getLogger("bench.queued")
+    start = run("queued json (caller side)", lambda i: log_request(queued_log, i))
+    dropped = _queue_handler.dropped
+    shutdown_logging()
+    report("queued json (incl. drain)", time.perf_counter() - start)
+    close_sink(reader, sink)
+
+    assert dropped == 0, f"{dropped} records dropped - benchmark numbers are not valid"
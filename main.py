@@ -4,8 +4,10 @@ from fastapi import FastAPI
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 # Line 2 ke neeche add karein
-from fastapi import HTTPException
+from fastapi import HTTPException, Request
 import sys
+import re
+import uuid
 # --- Yeh Imports Missing Hain ---
 import requests
 import bcrypt
@@ -16,9 +18,13 @@ from typing import Optional, Dict, List, Any
 from jose import JWTError, jwt
 from dotenv import load_dotenv
 
+from log_config import get_logger, request_id_var
+
 # (Yeh ensure karein ki .env file load ho)
 load_dotenv()
 
+logger = get_logger("main")
+
 GOOGLE_SHEET_WEBHOOK = os.getenv("GOOGLE_SHEET_WEBHOOK")
 JWT_SECRET = os.getenv("JWT_SECRET", "farozazeezsecret")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
@@ -27,8 +33,7 @@ JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 try:
     from rag_model import load_knowledge_base, get_feroze_response, get_consult_response
 except ImportError:
-    print("Error: Could not import functions from rag_core.py.")
-    print("Please ensure rag_core.py is in the same folder.")
+    logger.critical("Could not import functions from rag_model.py. Please ensure rag_model.py is in the same folder.")
     sys.exit(1)
 
 
@@ -66,14 +71,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+# --- Request ID Middleware ---
+# Har request ko ek ID milta hai jo uske saare log records mein jaata hai
+# Client ka X-Request-ID sirf tab use hota hai jab woh is format mein ho, warna naya ID banta hai
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9-]{1,64}")
+
+@app.middleware("http")
+async def add_request_id(request: Request, call_next):
+    request_id = request.headers.get("X-Request-ID", "")
+    if not REQUEST_ID_PATTERN.fullmatch(request_id):
+        request_id = uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 # --- 3. Knowledge Base Loading ---
 # Server start hote hi knowledge base load karein
-print("Loading Knowledge Base (FAISS, Embeddings)...")
+logger.info("Loading Knowledge Base (FAISS, Embeddings)...")
 try:
     retriever = load_knowledge_base()
-    print("Knowledge Base Loaded Successfully. Groq API is ready.")
-except Exception as e:
-    print(f"FATAL ERROR loading KB: {e}")
+    logger.info("Knowledge Base Loaded Successfully. Groq API is ready.")
+except Exception:
+    logger.critical("FATAL ERROR loading KB", exc_info=True)
     sys.exit(1)
 
 
@@ -141,7 +165,7 @@ def get_sheet_data(sheet_name: str, params: Optional[Dict[str, str]] = None) ->
             raise Exception(response_json.get('message', 'Unknown Apps Script Error')) 
             
     except Exception as e:
-        print(f"Error fetching {sheet_name}: {e}")
+        logger.error("Error fetching sheet", extra={"sheet": sheet_name, "error": str(e)})
         raise HTTPException(status_code=500, detail=f"Failed to fetch {sheet_name} data. Error: {str(e)}")
 
 # (Using File 1's version - good logging)
@@ -154,28 +178,27 @@ def append_to_sheet(sheet_name: str, data: Dict[str, Any]):
         headers = {"Content-Type": "application/json"}
         clean_data = {k: (v if v is not None else "") for k, v in data.items()}
 
-        print("➡️ Sending data to Google Sheet...")
-        print(f"📄 Sheet Name: {sheet_name}")
-        print(f"📦 Data: {clean_data}")
+        # Row sirf DEBUG par (sampled + redacted) log hota hai
+        logger.debug("Sending data to Google Sheet", extra={"sheet": sheet_name, "row": clean_data})
 
         res = requests.post(url, json=clean_data, headers=headers, timeout=10)
-        print(f"📨 Raw Response: {res.text}")
+        logger.debug("Google Sheet raw response", extra={"sheet": sheet_name, "response": res.text})
         res.raise_for_status()
 
         try:
             result = res.json()
         except Exception as parse_err:
-            print("⚠️ Could not parse JSON:", parse_err)
+            logger.warning("Could not parse Google Sheet JSON", extra={"sheet": sheet_name, "error": str(parse_err)})
             return {"status": "error", "message": res.text}
 
         if result.get("status") == "success":
-            print(f"✅ Successfully appended data to '{sheet_name}'.")
+            logger.info("Appended row to sheet", extra={"sheet": sheet_name})
         else:
-            print(f"⚠️ Google Sheet responded with: {result}")
+            logger.warning("Google Sheet append failed", extra={"sheet": sheet_name, "result": result})
         return result
 
     except Exception as e:
-        print(f"❌ Error appending to {sheet_name}: {e}")
+        logger.error("Error appending to sheet", extra={"sheet": sheet_name, "error": str(e)})
         raise HTTPException(
             status_code=500,
             detail=f"Failed to append data to '{sheet_name}' sheet. {e}"
@@ -194,18 +217,18 @@ def update_sheet_row(sheet_name: str, key_column: str, key_value: str, update_va
             "key": key_value,
             "updateValues": update_values
         }
-        print(f"➡️ Updating Google Sheet Row: {sheet_name}")
+        logger.debug("Updating Google Sheet row", extra={"sheet": sheet_name, "payload": payload})
         res = requests.post(url, json={"data": json.dumps(payload)}, headers=headers, timeout=10)
-        print(f"📨 Raw Response: {res.text}")
+        logger.debug("Google Sheet raw response", extra={"sheet": sheet_name, "response": res.text})
         res.raise_for_status()
         result = res.json()
         if result.get("status") == "success":
-            print(f"✅ Successfully updated row in '{sheet_name}'.")
+            logger.info("Updated row in sheet", extra={"sheet": sheet_name})
         else:
-            print(f"⚠️ Google Sheet responded with: {result}")
+            logger.warning("Google Sheet update failed", extra={"sheet": sheet_name, "result": result})
         return result
     except Exception as e:
-        print(f"❌ Error updating {sheet_name}: {e}")
+        logger.error("Error updating sheet", extra={"sheet": sheet_name, "error": str(e)})
         raise HTTPException(
             status_code=500,
             detail=f"Failed to update row in '{sheet_name}' sheet. {e}"
@@ -319,7 +342,7 @@ async def chat_endpoint(
     Only accessible by logged-in users.
     """
     user_question = request.question
-    print(f"--> Received question from: {current_user}") # Ab 'current_user' defined hai
+    logger.info("Received question", extra={"user": current_user, "question_chars": len(user_question)})
 
     # 1. User ki puraani history nikaalein
     # (Aapne 'current_user' ko as a key use kiya hai)
@@ -339,7 +362,9 @@ async def chat_endpoint(
     # 5. History ko update karein (limit mein rakhein)
     chat_histories[current_user] = user_history[-CHAT_HISTORY_LIMIT:]
     
-    print(f"<-- Sending answer: {response_text}")
+    # Poora answer sirf DEBUG par (sampled + truncated)
+    logger.info("Sending answer", extra={"user": current_user, "answer_chars": len(response_text)})
+    logger.debug("Answer text", extra={"answer": response_text})
     
     # Response JSON format mein waapis bhejein
     return ChatResponse(answer=response_text)
@@ -356,7 +381,10 @@ async def consult_endpoint(
     user_question = request.question
     user_screenshot_base64 = request.screenshot # Naya data
  
-    print(f"--> Received question AND screenshot from: {current_user}")
+    logger.info(
+        "Received question AND screenshot",
+        extra={"user": current_user, "question_chars": len(user_question), "screenshot_chars": len(user_screenshot_base64)},
+    )
 
     # 1. User ki puraani history nikaalein
     user_history = chat_histories.get(current_user, [])
@@ -372,8 +400,8 @@ async def consult_endpoint(
             retriever, 
             history_str
             )
-    except Exception as e:
-        print(f"Error during vision consultation: {e}")
+    except Exception:
+        logger.error("Error during vision consultation", exc_info=True)
         raise HTTPException(status_code=500, detail="Error processing image and question.")
 
     # 4. Naye message ko history mein save karein
@@ -383,7 +411,8 @@ async def consult_endpoint(
     # 5. History ko update karein
     chat_histories[current_user] = user_history[-CHAT_HISTORY_LIMIT:]
 
-    print(f"<-- Sending consult answer: {response_text}")
+    logger.info("Sending consult answer", extra={"user": current_user, "answer_chars": len(response_text)})
+    logger.debug("Consult answer text", extra={"answer": response_text})
 
     return ChatResponse(answer=response_text)
 
@@ -1,5 +1,13 @@
 import os
+import re
 import sys
+import json
+import shutil
+from typing import Dict, List
+
+from log_config import get_logger
+
+logger = get_logger("rag_model")
 
 # --- 1. Load API Key from .env file ---
 try:
@@ -7,8 +15,7 @@ try:
     # This will find the .env file in your RAG_MODEL folder
     load_dotenv() 
 except ImportError:
-    print("Error: 'python-dotenv' library not found.")
-    print("Please run: pip install python-dotenv")
+    logger.critical("'python-dotenv' library not found. Please run: pip install python-dotenv")
     sys.exit()
 
 # --- NAYE IMPORTS (NEW IMPORTS) ---
@@ -24,9 +31,12 @@ try:
     from langchain_text_splitters import RecursiveCharacterTextSplitter
     from langchain_community.embeddings import HuggingFaceEmbeddings
     from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
 except ImportError:
-    print("Error: Required libraries not found.")
-    print("Please run: pip install -U groq langchain-community langchain-text-splitters faiss-cpu sentence-transformers")
+    logger.critical(
+        "Required libraries not found. Please run: "
+        "pip install -U groq langchain-community langchain-text-splitters faiss-cpu sentence-transformers"
+    )
     sys.exit()
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -35,17 +45,16 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 try:
     genai.configure(api_key=GOOGLE_API_KEY)
     vision_model = genai.GenerativeModel('gemini-2.5-flash')
-    print("Gemini Vision Model initialized successfully.")
-except Exception as e:
-    print(f"Error initializing Gemini Vision: {e}")
+    logger.info("Gemini Vision Model initialized successfully.")
+except Exception:
+    logger.critical("Error initializing Gemini Vision", exc_info=True)
     sys.exit(1)
 
 # --- 3. Load the API Key and Initialize Groq Client ---
 API_KEY = os.getenv("GROQ_API_KEY")
 
 if not API_KEY:
-    print("Error: GROQ_API_KEY not found.")
-    print("Please make sure your API key is in the .env file (e.g., GROQ_API_KEY=your_key_here)")
+    logger.critical("GROQ_API_KEY not found. Please make sure your API key is in the .env file (e.g., GROQ_API_KEY=your_key_here)")
     sys.exit()
 
 # Initialize the native Groq client
@@ -55,7 +64,31 @@ GROQ_MODEL = "openai/gpt-oss-20b"
 
 # --- 4. Set File and Index Paths ---
 DOC_PATH = "docs/feroze.txt"
-INDEX_PATH = "feroze_faiss_index"
+# Har topic ka apna FAISS index is folder ke andar (INDEX_PATH/<topic>/) save hota hai
+INDEX_PATH = "feroze_faiss_index_sections"
+# Index poora save hone ke baad hi yeh file likhi jaati hai; isi se pata chalta hai kaunse topics load karne hain
+INDEX_MANIFEST = "topics.json"
+
+
+# --- 5. Section-aware Ingestion Settings ---
+# docs/feroze.txt "### SECTION N: TYPE - Title ### topic: <topic>" blocks mein bata hua hai.
+# Naya section add karte waqt uska topic header mein hi likhein; bina topic wala section
+# DEFAULT_TOPIC mein jaata hai (jo har search mein shamil hota hai).
+SECTION_HEADER = re.compile(r"^### SECTION (\d+): (.+?) ###(?:[ \t]+topic:[ \t]*(\w+))?[ \t]*$", re.MULTILINE)
+# Yeh blocks sirf metadata hain (views, timeline, hashtags) - index mein nahi jaate
+SKIP_SECTION_TYPES = {"INTERVIEW METADATA"}
+
+DEFAULT_TOPIC = "personal_finance"
+# User ke question mein keyword -> us topic ka index (+ DEFAULT_TOPIC) search hota hai.
+# Jis topic ki yahan entry nahi, uska index sirf un questions mein search hota hai jo kisi topic par route nahi hote.
+QUERY_TOPIC_KEYWORDS = {
+    "regulation": ["sebi", "regulation", "expense ratio", "mutual fund rules"],
+    "macro": ["gdp", "election", "economy", "economic growth"],
+    "allocation": ["allocate", "allocation", "lakh", "diwali", "where should i invest", "where to invest"],
+}
+
+RETRIEVER_K = 3        # Jab question kisi topic se match na ho (saare partitions)
+TOPIC_RETRIEVER_K = 2  # Jab question topic partition(s) + DEFAULT_TOPIC par route ho
 
 
 
@@ -84,51 +117,157 @@ Answer (as Feroze Azeez):
 """
 
 
+# =======================================================
+## Section-aware Chunking + Topic-partitioned Retrieval
+# =======================================================
+def split_into_sections(text: str, source: str) -> List[Document]:
+    """Split the knowledge base on its section markers, one Document per content section."""
+    matches = list(SECTION_HEADER.finditer(text))
+    sections = []
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        # Sections ke beech wala "---" separator hata do
+        body = text[match.end():end].strip().removesuffix("---").strip()
+        heading = match.group(2).strip()
+        section_type, _, title = heading.partition(" - ")
+
+        if section_type in SKIP_SECTION_TYPES or not body:
+            continue
+
+        sections.append(Document(
+            page_content=body,
+            metadata={
+                "source": source,
+                "section": int(match.group(1)),
+                "section_type": section_type,
+                "title": title or heading,
+                "topic": (match.group(3) or DEFAULT_TOPIC).lower(),
+            },
+        ))
+    return sections
+
+
+class SectionRetriever:
+    """
+    Retriever over one FAISS index per topic. Questions that mention a topic
+    search that topic's index plus DEFAULT_TOPIC (the general interviews);
+    everything else searches all of them.
+
+    DEFAULT_TOPIC holds ~80% of the indexed text, so routing barely cuts the
+    number of vectors scanned (a routed question still scans ~82-93%). What it
+    buys is a smaller prompt: TOPIC_RETRIEVER_K chunks instead of RETRIEVER_K.
+    """
+
+    def __init__(
+        self,
+        partitions: Dict[str, FAISS],
+        embeddings: HuggingFaceEmbeddings,
+        k: int = RETRIEVER_K,
+        topic_k: int = TOPIC_RETRIEVER_K,
+    ):
+        self.partitions = partitions
+        self.embeddings = embeddings
+        self.k = k
+        self.topic_k = topic_k
+
+    def route(self, query: str) -> List[str]:
+        query = query.lower()
+        topics = [
+            topic for topic, keywords in QUERY_TOPIC_KEYWORDS.items()
+            if topic in self.partitions and any(keyword in query for keyword in keywords)
+        ]
+        # Routing sirf chhote, unrelated partitions ko skip karta hai (scan ~7-18% kam) - general interviews
+        # (allocation, mutual funds sab yahin discuss hote hain) hamesha search hote hain
+        if topics and DEFAULT_TOPIC in self.partitions and DEFAULT_TOPIC not in topics:
+            topics.append(DEFAULT_TOPIC)
+        return topics
+
+    def _search(self, query_vector: List[float], topics: List[str], k: int) -> List[Document]:
+        # Sab partitions same embeddings use karte hain, isliye L2 scores aapas mein comparable hain
+        scored = []
+        for topic in topics:
+            scored.extend(self.partitions[topic].similarity_search_with_score_by_vector(query_vector, k=k))
+        scored.sort(key=lambda pair: pair[1])
+        return [doc for doc, _ in scored[:k]]
+
+    def invoke(self, query: str) -> List[Document]:
+        # Query ek hi baar embed hoti hai, phir har partition mein wahi vector search hota hai
+        query_vector = self.embeddings.embed_query(query)
+        topics = self.route(query)
+        if topics:
+            logger.debug("Retrieving from topic partitions", extra={"topics": topics})
+            return self._search(query_vector, topics, self.topic_k)
+        return self._search(query_vector, list(self.partitions), self.k)
+
+
 # =======================================================
 ## FUNCTION 1: Knowledge Base Loading (FastAPI will call this once)
 # =======================================================
 def load_knowledge_base():
-    """Builds or loads the FAISS index and returns the retriever object."""
-    print("Loading Embedding Model (all-MiniLM-L6-v2)...")
+    """Builds or loads the per-topic FAISS indexes and returns the retriever object."""
+    logger.info("Loading Embedding Model (all-MiniLM-L6-v2)...")
     embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
 
     # The logic below is directly from your original code block 5
-    if os.path.exists(INDEX_PATH):
-        # If index exists, load it
-        print(f"Loading existing Knowledge Base from '{INDEX_PATH}'...")
-        db = FAISS.load_local(
-            INDEX_PATH, 
-            embeddings, 
-            allow_dangerous_deserialization=True
-        )
-        print("Knowledge Base loaded successfully.")
+    manifest_path = os.path.join(INDEX_PATH, INDEX_MANIFEST)
+    if os.path.exists(manifest_path):
+        # If index exists, load the topics listed in its manifest
+        logger.info("Loading existing Knowledge Base", extra={"index_path": INDEX_PATH})
+        with open(manifest_path, encoding="utf-8") as f:
+            topics = json.load(f)["topics"]
+        partitions = {
+            topic: FAISS.load_local(
+                os.path.join(INDEX_PATH, topic),
+                embeddings,
+                allow_dangerous_deserialization=True
+            )
+            for topic in topics
+        }
+        logger.info("Knowledge Base loaded successfully.", extra={"topics": list(partitions)})
     else:
         # If index doesn't exist, build a new one
-        print(f"Knowledge Base not found. Building new one from '{DOC_PATH}'...")
+        logger.info("Knowledge Base not found. Building new one", extra={"doc_path": DOC_PATH})
         
         if not os.path.exists(DOC_PATH):
             raise FileNotFoundError(f"Error: Document file not found at '{DOC_PATH}'.")
 
-        # 1. Load
+        # 1. Load + split on section markers (metadata blocks skip ho jaate hain)
         loader = TextLoader(DOC_PATH, encoding="utf-8")
         documents = loader.load()
-        print(f"Documents from '{DOC_PATH}' loaded.")
+        sections = split_into_sections(documents[0].page_content, DOC_PATH)
+        logger.info("Documents split into sections", extra={"doc_path": DOC_PATH, "sections": len(sections)})
         
-        # 2. Split
+        # 2. Split each section (chunks kabhi do sections mein nahi phailte; metadata saath jaata hai)
         text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-        docs = text_splitter.split_documents(documents)
-        print(f"Documents split into {len(docs)} chunks.")
+        docs = text_splitter.split_documents(sections)
+        logger.info("Documents split into chunks", extra={"chunks": len(docs)})
         
-        # 3. Store
-        print("Creating vector database (FAISS)... This may take a moment.")
-        db = FAISS.from_documents(docs, embeddings)
+        # 3. Store - har topic ka alag index
+        logger.info("Creating vector database (FAISS)... This may take a moment.")
+        chunks_by_topic: Dict[str, List[Document]] = {}
+        for doc in docs:
+            chunks_by_topic.setdefault(doc.metadata["topic"], []).append(doc)
+        partitions = {
+            topic: FAISS.from_documents(topic_docs, embeddings)
+            for topic, topic_docs in chunks_by_topic.items()
+        }
         
-        # 4. Save
-        db.save_local(INDEX_PATH)
-        print(f"Knowledge Base built and saved to '{INDEX_PATH}'.")
+        # 4. Save - pehle temp folder mein, manifest sabse last, phir ek hi rename se INDEX_PATH par
+        tmp_path = f"{INDEX_PATH}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        for topic, db in partitions.items():
+            db.save_local(os.path.join(tmp_path, topic))
+        with open(os.path.join(tmp_path, INDEX_MANIFEST), "w", encoding="utf-8") as f:
+            json.dump({"topics": sorted(partitions)}, f)
+        if os.path.exists(INDEX_PATH):
+            # Manifest ke bina folder = adhoora/purana build - naya index taiyaar hone ke baad hi hatao
+            logger.warning("Replacing index folder that has no manifest", extra={"index_path": INDEX_PATH})
+            shutil.rmtree(INDEX_PATH)
+        os.replace(tmp_path, INDEX_PATH)
+        logger.info("Knowledge Base built and saved", extra={"index_path": INDEX_PATH, "topics": list(partitions)})
 
     # Create the Retriever and return it
-    return db.as_retriever(search_kwargs={"k": 3})
+    return SectionRetriever(partitions, embeddings)
 
 
 # =======================================================
@@ -172,9 +311,9 @@ def get_feroze_response(user_question: str, retriever, chat_history_str: str) ->
         # Return the final content (no streaming print needed)
         return completion.choices[0].message.content
         
-    except Exception as e:
+    except Exception:
         # Better error reporting for the server
-        print(f"\nGroq API An error occurred: {e}")
+        logger.error("Groq API error", exc_info=True)
         return "An internal error occurred while generating the AI response."
 
 
@@ -183,7 +322,7 @@ def get_consult_response(question: str, base64_image: str, retriever, history: s
     """
     Generates a response using RAG context, chat history, AND an image.
     """
-    print("Processing consultation with text and image...")
+    logger.info("Processing consultation with text and image...")
 
     # --- 1. Image ko process karein ---
     try:
@@ -192,11 +331,11 @@ def get_consult_response(question: str, base64_image: str, retriever, history: s
         # Image ko PIL format mein open karein
         img = Image.open(io.BytesIO(image_data))
     except Exception as e:
-        print(f"Error processing image: {e}")
+        logger.warning("Error processing image", extra={"error": str(e)})
         return "I'm sorry, I couldn't understand the screenshot you sent. Please try again."
 
     # --- 2. RAG Context Haasil Karein ---
-    print("Fetching RAG context for vision query...")
+    logger.debug("Fetching RAG context for vision query...")
     context_docs = retriever.invoke(question)
     context = "\n\n".join([doc.page_content for doc in context_docs])
 
@@ -222,13 +361,13 @@ def get_consult_response(question: str, base64_image: str, retriever, history: s
     ]
 
     # --- 4. Gemini Vision ko Call Karein ---
-    print("Calling Gemini Vision API...")
+    logger.debug("Calling Gemini Vision API...")
     try:
         response = vision_model.generate_content(prompt_parts)
         response_text = response.text
-        print("Successfully got response from Gemini Vision.")
-    except Exception as e:
-        print(f"Error calling Gemini Vision: {e}")
+        logger.info("Got response from Gemini Vision", extra={"answer_chars": len(response_text)})
+    except Exception:
+        logger.error("Error calling Gemini Vision", exc_info=True)
         response_text = "I'm sorry, I encountered an error analyzing the screen. Please ask again."
 
     return response_text # <-- ✅ ERROR 3 FIX: Jawab ko return kiya